@@ -1,42 +1,66 @@
-import json
-from typing import Any
+import sys
+from typing import Any, Iterator
 import logging
-from collections import Counter
+from collections import defaultdict
 
+from jsonstream import iter_json_array
 from macros import Macro, PreprocessorData, Invocation
 
 logger = logging.getLogger(__name__)
 
-def filter_definitions(entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
-    # Count the number of definitions with a given name
-    name_counts = Counter(obj["Name"] for obj in entries if obj["Kind"] == "Definition")
-
-    # Create set of definition names that only appear once
-    filtered_names = {name for name in name_counts if name_counts[name] == 1}
-
-    # Filter out definitions and invocations that are not in filtered_names
-    filtered_entries = [
-        obj for obj in entries
-        if not ((obj["Kind"] == "Definition" and obj["Name"] not in filtered_names) or
-               (obj["Kind"] == "Invocation" and obj["Name"] not in filtered_names))
-    ]
-
-    return filtered_entries
+def iter_entries(results_file: str) -> Iterator[dict[str, Any]]:
+    with open(results_file) as fp:
+        yield from iter_json_array(fp)
+
+def filter_definitions(definitions: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Record the names of definitions, and which of them appear more than once
+    definition_names: set[str] = set()
+    duplicate_names: set[str] = set()
+    for obj in definitions:
+        name = obj["Name"]
+        if name in definition_names:
+            duplicate_names.add(name)
+        else:
+            definition_names.add(name)
+
+    # Filter out definitions whose name is not defined exactly once
+    return [obj for obj in definitions if obj["Name"] not in duplicate_names]
 
 def get_tlna_src_preprocessordata(results_file: str) -> PreprocessorData:
 
-    with open(results_file) as fp:
-        entries = json.load(fp)
+    pd = PreprocessorData()
+
+    # The analysis file can be very large, so we stream over it once rather
+    # than loading it all at once. Invocations are converted to (much smaller)
+    # Invocation objects as they are read, and mapped to their definitions
+    # once all definitions have been seen
+    definitions: list[dict[str, Any]] = []
+    invocations: list[Invocation] = []
+    for entry in iter_entries(results_file):
+        kind = entry["Kind"]
+        if kind == "Definition":
+            entry["Name"] = sys.intern(entry["Name"])
+            entry["DefinitionLocation"] = sys.intern(entry["DefinitionLocation"])
+            definitions.append(entry)
+        elif kind == 'Invocation':
+            # Interning lets the many invocations of a macro share these strings,
+            # and speeds up the dict and set lookups and comparisons made on them
+            entry["Name"] = sys.intern(entry["Name"])
+            entry["DefinitionLocation"] = sys.intern(entry["DefinitionLocation"])
+            entry["InvocationLocation"] = sys.intern(entry["InvocationLocation"])
+            entry["ASTKind"] = sys.intern(entry["ASTKind"])
+            entry["TypeSignature"] = sys.intern(entry["TypeSignature"])
+            invocations.append(Invocation.from_json(entry))
+        elif kind == 'InspectedByCPP':
+            pd.inspected_macro_names.add(sys.intern(entry["Name"]))
+        elif kind == "Include":
+            if entry["IsValid"]:
+                pd.local_includes.add(sys.intern(entry["IncludeName"]))
 
     # Filter out duplicate definitions: keep none if there is more than one
     # We need to do this to avoid (possibly) breaking the one definition rule
     # i.e if file B includes file A, both have a definition with the same name
-    filtered_entries = filter_definitions(entries)
-
-    # We need definitions to come first as we map invocations to them
-    filtered_entries.sort(key=lambda obj: obj["Kind"] == "Definition", reverse=True)
-
-    pd = PreprocessorData()
+    definitions = filter_definitions(definitions)
 
     # src directory, to be initialized during the analysis
     src_dir = ''
@@ -46,45 +70,44 @@ def get_tlna_src_preprocessordata(results_file: str) -> PreprocessorData:
     # NOTE: Currently ignores macros without FileEntry data (i.e compiler built-ins)
     macroDefinitionLocationToMacroObject: dict[str, Macro] = {}
 
-    for entry in filtered_entries:
-        if entry["Kind"] == "Definition":
-            del entry["Kind"]
-            m = Macro(**entry)
-            if m not in pd.mm:
-                pd.mm[m] = set()
-            if m.IsDefinitionLocationValid:
-                macroDefinitionLocationToMacroObject[entry["DefinitionLocation"]] = m
-                logging.debug(f"Adding name {m.Name} to macroDefinitionLocationToMacroObject")
-        elif entry["Kind"] == 'InspectedByCPP':
-            pd.inspected_macro_names.add(entry["Name"])
-        elif entry["Kind"] == "Include":
-            if entry["IsValid"]:
-                pd.local_includes.add(entry["IncludeName"])
-        elif entry["Kind"] == 'Invocation':
-            del entry["Kind"]
-            i = Invocation(**entry)
-            if i.IsDefinitionLocationValid:
-                m = macroDefinitionLocationToMacroObject[i.DefinitionLocation]
-                # Only record unique invocations - two invocations may have the same
-                # location if they are the same nested invocation
-                if all(j.InvocationLocation != i.InvocationLocation for j in pd.mm[m]):
-                    pd.mm[m].add(i)
-
-    # src_pd only records preprocessor data about source macros
-    src_pd = PreprocessorData(
-        {m: is_ for m, is_ in pd.mm.items() if m.defined_in(src_dir)},
-        pd.inspected_macro_names,
-        pd.local_includes
-    )
-
-    # tlna_src_pd only records preprocessor data about top-level,
-    # non-argument source macros
-    tlna_src_pd = PreprocessorData(
-        {m: is_ for m, is_ in src_pd.mm.items()
-         if all([i.IsTopLevelNonArgument for i in is_])},
-        src_pd.inspected_macro_names,
-        src_pd.local_includes
-    )
-
-
-    return tlna_src_pd
+    for entry in definitions:
+        m = Macro.from_json(entry)
+        if m not in pd.mm:
+            pd.mm[m] = []
+        if m.IsDefinitionLocationValid:
+            macroDefinitionLocationToMacroObject[entry["DefinitionLocation"]] = m
+            logger.debug("Adding name %s to macroDefinitionLocationToMacroObject", m.Name)
+
+    # Only invocations of macros that are defined exactly once are recorded
+    macro_names = {entry["Name"] for entry in definitions}
+    del definitions
+
+    # Invocation locations already recorded for each macro, keyed by the
+    # macro's (interned) definition location, which is cheaper to hash than
+    # the Macro itself
+    seenInvocationLocations: dict[str, set[str]] = defaultdict(set)
+
+    # Map invocations to their definitions
+    for i in invocations:
+        if i.Name not in macro_names:
+            continue
+        if i.IsDefinitionLocationValid:
+            m = macroDefinitionLocationToMacroObject[i.DefinitionLocation]
+            # Only record unique invocations - two invocations may have the same
+            # location if they are the same nested invocation.
+            # Invocations are kept in the order Maki reported them, so that
+            # the skip reason reported for a macro does not depend on set order
+            seen = seenInvocationLocations[i.DefinitionLocation]
+            if i.InvocationLocation not in seen:
+                seen.add(i.InvocationLocation)
+                pd.mm[m].append(i)
+
+    # Only record preprocessor data about top-level, non-argument source
+    # macros. The macro map is pruned in place, in a single pass, rather than
+    # copied into successive filtered PreprocessorData objects
+    for m in [m for m, is_ in pd.mm.items()
+              if not (m.defined_in(src_dir) and
+                      all(i.IsTopLevelNonArgument for i in is_))]:
+        del pd.mm[m]
+
+    return pd
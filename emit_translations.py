@@ -1,53 +1,25 @@
 #!/usr/bin/python3
 
 import argparse
+import concurrent.futures
 import logging
 import os
 import pathlib
+from collections import defaultdict
 
 from analyze_transformations import get_tlna_src_preprocessordata
-from macros import Macro
+from macros import Macro, parse_location
 from macrotranslator import MacroTranslator
 from translationconfig import TranslationConfig, IntSize
 
 logger = logging.getLogger(__name__)
 
 
-def translate_src_files(src_dir: pathlib.Path, out_dir: pathlib.Path, translations: dict[Macro, str | None]) -> None:
-    # dict of src files to their contents in lines
-    src_file_contents: dict[str, list[str]] = {}
-    for macro, translation in translations.items():
-        # If we don't have a translation for this macro, skip it
-        if translation is None:
-            continue
-
-        # open the source file
-        startDefLocParts = macro.DefinitionLocation.split(":")
-        endDefLocParts = macro.EndDefinitionLocation.split(":")
-
-        src_file_path = startDefLocParts[0]
-
-        # only open files in src dir
-        if not src_file_path.startswith(str(src_dir)):
-            logger.warning(f"Skipping {src_file_path} because it is not in the source directory {src_dir}")
-            continue
-
-        logger.info(f"Translating {src_file_path}")
-
-        src_file_content: list[str]
-
-        if src_file_path not in src_file_contents:
-            with open(src_file_path, 'r') as f:
-                src_file_contents[src_file_path] = f.readlines()
-                src_file_content = src_file_contents[src_file_path]
-        else:
-            src_file_content = src_file_contents[src_file_path]
-
-        # replace macro with translation
-        # Clear lines between start and end definition location
-        startLine = int(startDefLocParts[1]) - 1
-        endLine = int(endDefLocParts[1]) - 1
+def translate_src_file(src_file_path: str, dst_file_path: str, edits: list[tuple[int, int, str]]) -> None:
+    with open(src_file_path, 'r') as f:
+        src_file_content = f.readlines()
 
+    for startLine, endLine, translation in edits:
         endLineContent = src_file_content[endLine]
 
         # Some code bases may define macros with an opening comment on the last line,
@@ -57,10 +29,11 @@ def translate_src_files(src_dir: pathlib.Path, out_dir: pathlib.Path, translatio
         if '/*' in endLineContent.strip() and '*/' not in endLineContent.strip():
                 endLineComment = '/*' + endLineContent.split('/*', 1)[1]
 
-        for i in range(startLine, endLine + 1):
-            src_file_content[i] = '\n'
+        # replace macro with translation
+        # Clear lines between start and end definition location
+        src_file_content[startLine:endLine + 1] = ['\n'] * (endLine - startLine + 1)
 
-        logger.debug(f"Translation for {src_file_path}: {translation}")
+        logger.debug("Translation for %s: %s", src_file_path, translation)
 
         # Insert the translation
         src_file_content[startLine] = translation
@@ -68,11 +41,50 @@ def translate_src_files(src_dir: pathlib.Path, out_dir: pathlib.Path, translatio
         # Append the comment back to the end of the line
         src_file_content[endLine] += endLineComment + '\n'
 
-    for src_file_path, src_file_content in src_file_contents.items():
-        dst_file_path = os.path.join(out_dir, os.path.relpath(src_file_path, src_dir))
-        os.makedirs(os.path.dirname(dst_file_path), exist_ok=True)
-        with open(dst_file_path, 'w') as f:
-            f.writelines(src_file_content)
+    os.makedirs(os.path.dirname(dst_file_path), exist_ok=True)
+    with open(dst_file_path, 'w') as f:
+        # A single write of the joined lines avoids a write call per line
+        f.write(''.join(src_file_content))
+
+
+def translate_src_files(src_dir: pathlib.Path, out_dir: pathlib.Path, translations: dict[Macro, str | None]) -> None:
+    # dict of src files to the (start line, end line, translation) edits to make
+    # to them, in the order they are to be applied
+    edits_by_file: dict[str, list[tuple[int, int, str]]] = defaultdict(list)
+    # dict of files that macros are defined in to whether they are in the src dir
+    in_src_dir: dict[str, bool] = {}
+    src_dir_prefix = os.path.join(src_dir, "")
+    for macro, translation in translations.items():
+        # If we don't have a translation for this macro, skip it
+        if translation is None:
+            continue
+
+        src_file_path, startLine, _startCol = parse_location(macro.DefinitionLocation)
+        _endFile, endLine, _endCol = parse_location(macro.EndDefinitionLocation)
+
+        # only translate files in src dir
+        if src_file_path not in in_src_dir:
+            in_src_dir[src_file_path] = src_file_path.startswith(src_dir_prefix)
+        if not in_src_dir[src_file_path]:
+            logger.warning("Skipping %s because it is not in the source directory %s", src_file_path, src_dir)
+            continue
+
+        logger.info("Translating %s", src_file_path)
+
+        # Lines are 1-indexed
+        edits_by_file[src_file_path].append((startLine - 1, endLine - 1, translation))
+
+    # Each file is read, edited, and written independently, so overlap their
+    # I/O. Only the files currently being translated are held in memory
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        futures = [executor.submit(translate_src_file,
+                                   src_file_path,
+                                   os.path.join(out_dir, os.path.relpath(src_file_path, src_dir)),
+                                   edits)
+                   for src_file_path, edits in edits_by_file.items()]
+        # Raise any translation errors here
+        for future in futures:
+            future.result()
 
 
 def main():
@@ -0,0 +1,80 @@
+import json
+from typing import Any, Iterator, TextIO
+
+# An element that fails to decode, or a number that decodes, within this many
+# characters of the end of the buffer may just have been cut off by the chunk
+# boundary (e.g. "12" of "123", "tr" of "true", or "1." of "1.5")
+_TRUNCATION_WINDOW = 16
+
+def iter_json_array(fp: TextIO, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Lazily yields the elements of the top-level JSON array in fp, so that the
+    whole array never has to be held in memory at once.
+    Raises a ValueError if fp does not contain exactly one JSON array
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+
+    def skip_whitespace() -> bool:
+        # Advance pos to the next non-whitespace character, reading more of fp
+        # as needed. Returns False if the end of fp is reached first
+        nonlocal buf, pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\n\r':
+                pos += 1
+            if pos < len(buf):
+                return True
+            buf, pos = fp.read(chunk_size), 0
+            if not buf:
+                return False
+
+    def decode_element() -> Any:
+        nonlocal buf, pos
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+                cut_off = len(buf) - end < _TRUNCATION_WINDOW and isinstance(obj, (int, float))
+            except json.JSONDecodeError as e:
+                # Only retry if the element may have been cut off at the end of
+                # the buffer; a malformed element is reported immediately
+                if not (len(buf) - e.pos < _TRUNCATION_WINDOW or
+                        e.msg.startswith('Unterminated string')):
+                    raise
+                chunk = fp.read(chunk_size)
+                if not chunk:
+                    raise
+                buf, pos = buf[pos:] + chunk, 0
+                continue
+            if cut_off:
+                chunk = fp.read(chunk_size)
+                if chunk:
+                    buf, pos = buf[pos:] + chunk, 0
+                    continue
+            pos = end
+            return obj
+
+    if not skip_whitespace() or buf[pos] != '[':
+        raise ValueError(f"Expected a JSON array in {fp.name}")
+    pos += 1
+
+    if not skip_whitespace():
+        raise ValueError(f"Unterminated JSON array in {fp.name}")
+    if buf[pos] != ']':
+        while True:
+            yield decode_element()
+            # Elements must be separated by exactly one comma
+            if not skip_whitespace():
+                raise ValueError(f"Unterminated JSON array in {fp.name}")
+            if buf[pos] == ']':
+                break
+            if buf[pos] != ',':
+                raise ValueError(f"Expected ',' or ']' in JSON array in {fp.name}, got {buf[pos]!r}")
+            pos += 1
+            if not skip_whitespace():
+                raise ValueError(f"Unterminated JSON array in {fp.name}")
+    pos += 1
+
+    # Nothing but whitespace may follow the array
+    if skip_whitespace():
+        raise ValueError(f"Extra data after JSON array in {fp.name}")
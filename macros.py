@@ -1,9 +1,18 @@
-from dataclasses import dataclass, field
-from typing import Literal, Set
+import functools
+import operator
+from dataclasses import dataclass, field, fields
+from typing import Any, Literal, Set
 from translationconfig import IntSize
 
 
-@dataclass(frozen=True)
+@functools.lru_cache(maxsize=None)
+def parse_location(location: str) -> tuple[str, int, int]:
+    '''Splits a valid file:line:col location into its file, line, and column'''
+    file, line, col = location.rsplit(':', 2)
+    return file, int(line), int(col)
+
+
+@dataclass(frozen=True, slots=True)
 class Macro:
     Name: str
     IsObjectLike: bool
@@ -21,8 +30,22 @@ class Macro:
     def IsFunctionLike(self) -> bool:
         return not self.IsObjectLike
 
+    def __hash__(self) -> int:
+        # A definition is identified by its name and location, so there is no
+        # need to hash the other fields. Equality still compares every field
+        return hash((self.Name, self.DefinitionLocation))
+
+    @staticmethod
+    def from_json(json_entry: dict[str, Any]) -> 'Macro':
+        # Pass fields positionally, as keyword arguments are much slower to
+        # bind. Keys not in the dataclass (e.g. Kind) are ignored
+        return Macro(*_get_macro_fields(json_entry))
+
+
+_get_macro_fields = operator.itemgetter(*(f.name for f in fields(Macro)))
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Invocation:
     Name: str
     DefinitionLocation: str
@@ -89,12 +112,18 @@ class Invocation:
     IsAnyArgumentNeverExpanded: bool
     IsAnyArgumentNotAnExpression: bool
 
+    @staticmethod
+    def from_json(json_entry: dict[str, Any]) -> 'Invocation':
+        # Pass fields positionally, as keyword arguments are much slower to
+        # bind. Keys not in the dataclass (e.g. Kind) are ignored
+        return Invocation(*_get_invocation_fields(json_entry))
+
     @property
     def DefinitionLocationFilename(self) -> str:
         if not self.IsDefinitionLocationValid:
             return self.DefinitionLocation
         else:
-            file, _line, _col = self.DefinitionLocation.split(':')
+            file, _line, _col = parse_location(self.DefinitionLocation)
             return file
 
     @property
@@ -103,27 +132,27 @@ class Invocation:
 
     @property
     def IsTopLevelNonArgument(self) -> bool:
-        return all([self.InvocationDepth == 0,
-                    not self.IsInvokedInMacroArgument,
-                    self.IsInvocationLocationValid,
-                    self.IsDefinitionLocationValid])
+        return (self.InvocationDepth == 0 and
+                not self.IsInvokedInMacroArgument and
+                self.IsInvocationLocationValid and
+                self.IsDefinitionLocationValid)
 
     @property
     def IsAligned(self) -> bool:
         assert self.IsTopLevelNonArgument
-        return all([self.IsTopLevelNonArgument,
-                    self.NumASTRoots == 1,
-                    self.HasAlignedArguments])
+        return (self.IsTopLevelNonArgument and
+                self.NumASTRoots == 1 and
+                self.HasAlignedArguments)
 
     @property
     def HasSemanticData(self) -> bool:
-        return all([
+        return (
             # TODO: Check that we don't end with a compound statement
-            self.IsTopLevelNonArgument,
-            not self.IsAnyArgumentNeverExpanded,
-            self.IsAligned,
+            self.IsTopLevelNonArgument and
+            not self.IsAnyArgumentNeverExpanded and
+            self.IsAligned and
             not (self.ASTKind == 'Expr' and self.IsExpansionTypeNull)
-        ])
+        )
 
     @property
     def CanBeTurnedIntoEnum(self) -> bool:
@@ -134,24 +163,24 @@ class Invocation:
     @property
     def CanBeTurnedIntoVariable(self) -> bool:
         assert self.HasSemanticData
-        return all([
+        return (
             # Variables must be exprs
-            self.ASTKind == 'Expr',
+            self.ASTKind == 'Expr' and
             # Variables cannot contain DeclRefExprs
-            not self.DoesBodyContainDeclRefExpr,
+            not self.DoesBodyContainDeclRefExpr and
             # Variables cannot be invoked where ICEs are required
-            not self.IsInvokedWhereICERequired,
+            not self.IsInvokedWhereICERequired and
             # Variables cannot have the void type
             not self.IsExpansionTypeVoid
-        ])
+        )
 
     @property
     def IsExpansionConstantExpression(self) -> bool:
-        return all([
-            self.ASTKind == 'Expr',
+        return (
+            self.ASTKind == 'Expr' and
             # Variables cannot contain DeclRefExprs
-            not self.DoesBodyContainDeclRefExpr,
-        ])
+            not self.DoesBodyContainDeclRefExpr
+        )
 
     @property
     def CanBeTurnedIntoEnumOrVariable(self) -> bool:
@@ -161,12 +190,12 @@ class Invocation:
     @property
     def CanBeTurnedIntoFunction(self) -> bool:
         assert self.HasSemanticData
-        return all([
+        return (
             # Functions must be stmts or expressions
-            (self.ASTKind == 'Stmt' or self.ASTKind == 'Expr'),
+            (self.ASTKind == 'Stmt' or self.ASTKind == 'Expr') and
             # Functions cannot be invoked where ICEs are required
             not self.IsInvokedWhereICERequired
-        ])
+        )
 
     @property
     def CanBeTurnedIntoAFunctionOrVariable(self) -> bool:
@@ -182,28 +211,28 @@ class Invocation:
     @property
     def MustAlterArgumentsOrReturnTypeToTransform(self) -> bool:
         assert self.HasSemanticData
-        return any([
-            not self.IsHygienic,
-            self.IsInvokedWhereModifiableValueRequired,
-            self.IsInvokedWhereAddressableValueRequired,
-            self.IsAnyArgumentExpandedWhereModifiableValueRequired,
+        return (
+            not self.IsHygienic or
+            self.IsInvokedWhereModifiableValueRequired or
+            self.IsInvokedWhereAddressableValueRequired or
+            self.IsAnyArgumentExpandedWhereModifiableValueRequired or
             self.IsAnyArgumentExpandedWhereAddressableValueRequired
-        ])
+        )
 
     @property
     def MustAlterDeclarationsToTransform(self) -> bool:
         assert self.HasSemanticData
-        return any([
-            self.HasSameNameAsOtherDeclaration,
-            self.DoesBodyReferenceMacroDefinedAfterMacro,
-            self.DoesBodyReferenceDeclDeclaredAfterMacro,
-            self.DoesSubexpressionExpandedFromBodyHaveLocalType,
-            self.DoesSubexpressionExpandedFromBodyHaveTypeDefinedAfterMacro,
-            self.IsExpansionTypeAnonymous,
-            self.IsExpansionTypeLocalType,
-            self.IsExpansionTypeDefinedAfterMacro,
+        return (
+            self.HasSameNameAsOtherDeclaration or
+            self.DoesBodyReferenceMacroDefinedAfterMacro or
+            self.DoesBodyReferenceDeclDeclaredAfterMacro or
+            self.DoesSubexpressionExpandedFromBodyHaveLocalType or
+            self.DoesSubexpressionExpandedFromBodyHaveTypeDefinedAfterMacro or
+            self.IsExpansionTypeAnonymous or
+            self.IsExpansionTypeLocalType or
+            self.IsExpansionTypeDefinedAfterMacro or
             self.ASTKind == 'TypeLoc'
-        ])
+        )
 
     @property
     def MustAlterCallSiteToTransform(self) -> bool:
@@ -215,10 +244,10 @@ class Invocation:
 
     @property
     def MustCreateThunksToTransform(self) -> bool:
-        return any([
-            self.DoesAnyArgumentHaveSideEffects,
+        return (
+            self.DoesAnyArgumentHaveSideEffects or
             self.IsAnyArgumentTypeVoid
-        ])
+        )
 
     @property
     def MustUseMetaprogrammingToTransform(self) -> bool:
@@ -237,41 +266,41 @@ class Invocation:
     @property
     def SatisfiesAScopingRuleProperty(self) -> bool:
         assert self.HasSemanticData
-        return any([
-            not self.IsHygienic,
-            self.IsInvokedWhereModifiableValueRequired,
-            self.IsInvokedWhereAddressableValueRequired,
-            self.IsAnyArgumentExpandedWhereModifiableValueRequired,
-            self.IsAnyArgumentExpandedWhereAddressableValueRequired,
-            self.DoesBodyReferenceMacroDefinedAfterMacro,
-            self.DoesBodyReferenceDeclDeclaredAfterMacro,
-            self.DoesSubexpressionExpandedFromBodyHaveLocalType,
-            self.DoesSubexpressionExpandedFromBodyHaveTypeDefinedAfterMacro,
-            self.IsAnyArgumentTypeDefinedAfterMacro,
-            self.IsAnyArgumentTypeLocalType,
-        ])
+        return (
+            not self.IsHygienic or
+            self.IsInvokedWhereModifiableValueRequired or
+            self.IsInvokedWhereAddressableValueRequired or
+            self.IsAnyArgumentExpandedWhereModifiableValueRequired or
+            self.IsAnyArgumentExpandedWhereAddressableValueRequired or
+            self.DoesBodyReferenceMacroDefinedAfterMacro or
+            self.DoesBodyReferenceDeclDeclaredAfterMacro or
+            self.DoesSubexpressionExpandedFromBodyHaveLocalType or
+            self.DoesSubexpressionExpandedFromBodyHaveTypeDefinedAfterMacro or
+            self.IsAnyArgumentTypeDefinedAfterMacro or
+            self.IsAnyArgumentTypeLocalType
+        )
 
     @property
     def SatisfiesATypingProperty(self) -> bool:
         assert self.HasSemanticData
-        return any([
-            self.IsExpansionTypeAnonymous,
-            self.IsAnyArgumentTypeAnonymous,
-            self.DoesSubexpressionExpandedFromBodyHaveLocalType,
-            self.IsAnyArgumentTypeDefinedAfterMacro,
-            self.DoesSubexpressionExpandedFromBodyHaveTypeDefinedAfterMacro,
-            self.IsAnyArgumentTypeVoid,
-            (self.IsObjectLike and self.IsExpansionTypeVoid),
+        return (
+            self.IsExpansionTypeAnonymous or
+            self.IsAnyArgumentTypeAnonymous or
+            self.DoesSubexpressionExpandedFromBodyHaveLocalType or
+            self.IsAnyArgumentTypeDefinedAfterMacro or
+            self.DoesSubexpressionExpandedFromBodyHaveTypeDefinedAfterMacro or
+            self.IsAnyArgumentTypeVoid or
+            (self.IsObjectLike and self.IsExpansionTypeVoid) or
             self.IsAnyArgumentTypeLocalType
-        ])
+        )
 
     @property
     def SatisfiesACallingConventionProperty(self) -> bool:
         assert self.HasSemanticData
-        return any([
-            self.DoesAnyArgumentHaveSideEffects,
-            self.IsAnyArgumentConditionallyEvaluated,
-        ])
+        return (
+            self.DoesAnyArgumentHaveSideEffects or
+            self.IsAnyArgumentConditionallyEvaluated
+        )
 
     @property
     def SatisfiesALanguageSpecificProperty(self) -> bool:
@@ -299,24 +328,27 @@ class Invocation:
 
     @property
     def IsCalledByName(self) -> bool:
-        return any([
-            self.IsAnyArgumentConditionallyEvaluated,
-            self.DoesAnyArgumentHaveSideEffects,
-            ])
+        return (
+            self.IsAnyArgumentConditionallyEvaluated or
+            self.DoesAnyArgumentHaveSideEffects
+            )
 
     @property
     def ArgumentsCaptureEnvironment(self) -> bool:
-        return any([
-            self.IsAnyArgumentTypeAnonymous,
-            self.IsAnyArgumentTypeLocalType,
-            self.IsAnyArgumentTypeDefinedAfterMacro,
-            ])
+        return (
+            self.IsAnyArgumentTypeAnonymous or
+            self.IsAnyArgumentTypeLocalType or
+            self.IsAnyArgumentTypeDefinedAfterMacro
+            )
+
+
+_get_invocation_fields = operator.itemgetter(*(f.name for f in fields(Invocation)))
 
 
-MacroMap = dict[Macro, Set[Invocation]]
+MacroMap = dict[Macro, list[Invocation]]
 
 
-@dataclass
+@dataclass(slots=True)
 class PreprocessorData:
     mm: MacroMap = field(default_factory=dict)
     inspected_macro_names: Set[str] = field(default_factory=set)
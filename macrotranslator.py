@@ -1,4 +1,5 @@
 import logging
+from collections.abc import Callable
 from macros import Macro, Invocation, PreprocessorData
 from predicates.interface_equivalent import ie_def, TranslationTarget
 from translationconfig import TranslationConfig
@@ -12,48 +13,42 @@ class MacroTranslator:
     def __init__(self, translation_config: TranslationConfig) -> None:
         self.translation_config = translation_config
         self.translation_stats = TranslationRecords()
+        # The method that translates macros to each translation target
+        self.translators: dict[TranslationTarget, Callable[[Macro, list[Invocation]], MacroRecord]] = {
+            TranslationTarget.VOID_FUNCTION: self.translate_macro_to_void_function,
+            TranslationTarget.NON_VOID_FUNCTION: self.translate_macro_to_non_void_function,
+            TranslationTarget.GLOBAL_VARIABLE: self.translate_macro_to_global_variable,
+            TranslationTarget.ENUM: self.translate_macro_to_enum,
+        }
 
     def generate_macro_translations(self,
                                     pd: PreprocessorData) -> dict[Macro, str | None]:
         translationMap: dict[Macro, str | None] = {}
 
-
         for macro, invocations in pd.mm.items():
             record = self.get_macro_record(macro, invocations, pd)
             if isinstance(record, TranslationRecord):
                 self.translation_stats.add_translation_record(record)
+                translationMap[macro] = record.macro_translation
             elif isinstance(record, SkipRecord):
                 self.translation_stats.add_skip_record(record)
-
-        for skip_record in self.translation_stats.skip_records:
-            translationMap[skip_record.macro] = None
-
-        for translation_record in self.translation_stats.translation_records:
-            translationMap[translation_record.macro] = translation_record.macro_translation
+                translationMap[macro] = None
 
         return translationMap
 
-    def get_macro_record(self, macro: Macro, invocations: set[Invocation], pd: PreprocessorData) -> MacroRecord:
+    def get_macro_record(self, macro: Macro, invocations: list[Invocation], pd: PreprocessorData) -> MacroRecord:
         ie_result, translation_target = ie_def(macro, pd, self.translation_config)
 
-        if translation_target is not None:
-            skip_reason = self.should_skip_due_to_technical_limitations(macro, invocations)
-            if skip_reason:
-                return SkipRecord(macro, invocations, skip_reason)
-
-        match translation_target:
-            case TranslationTarget.VOID_FUNCTION:
-                return self.translate_macro_to_void_function(macro, invocations)
-            case TranslationTarget.NON_VOID_FUNCTION:
-                return self.translate_macro_to_non_void_function(macro, invocations)
-            case TranslationTarget.GLOBAL_VARIABLE:
-                return self.translate_macro_to_global_variable(macro, invocations)
-            case TranslationTarget.ENUM:
-                return self.translate_macro_to_enum(macro, invocations)
-            case None:
-                return SkipRecord(macro, invocations, ie_result)
-
-    def should_skip_due_to_technical_limitations(self, macro: Macro, invocations: set[Invocation]) -> TechnicalSkip | None:
+        if translation_target is None:
+            return SkipRecord(macro, invocations, ie_result)
+
+        skip_reason = self.should_skip_due_to_technical_limitations(macro, invocations)
+        if skip_reason:
+            return SkipRecord(macro, invocations, skip_reason)
+
+        return self.translators[translation_target](macro, invocations)
+
+    def should_skip_due_to_technical_limitations(self, macro: Macro, invocations: list[Invocation]) -> TechnicalSkip | None:
         """
         Skips are due to technical limitations of Maki and MerC and not
         due to irreconcilable differences in macro and C semantics.
@@ -73,7 +68,7 @@ class MacroTranslator:
 
         # TODO(Joey): Implement a way to translate these
         if invocation_has_function_type:
-            logger.debug(f"Skipping {macro.Name} as it has a function pointer type")
+            logger.debug("Skipping %s as it has a function pointer type", macro.Name)
             return TechnicalSkip.DEFINITION_HAS_FUNCTION_POINTER
 
         # If body contains a DeclRefExpr and is in a header file, skip
@@ -82,28 +77,28 @@ class MacroTranslator:
 
         invocation_has_decl_ref_expr = invocation.DoesBodyContainDeclRefExpr
         if invocation_has_decl_ref_expr and invocation.DefinitionLocationFilename.endswith(".h"):
-            logger.debug(f"Skipping {macro.Name} as it contains a DeclRefExpr")
+            logger.debug("Skipping %s as it contains a DeclRefExpr", macro.Name)
             return TechnicalSkip.BODY_CONTAINS_DECL_REF_EXPR
 
         return None
 
-    def translate_macro_to_void_function(self, macro: Macro, invocations: set[Invocation]) -> TranslationRecord:
+    def translate_macro_to_void_function(self, macro: Macro, invocations: list[Invocation]) -> TranslationRecord:
         invocation = next(iter(invocations))
 
         translation = f"static inline {invocation.TypeSignature} {{ {macro.Body}; }}"
         return TranslationRecord(macro, invocations, translation, TranslationTarget.VOID_FUNCTION)
     
-    def translate_macro_to_non_void_function(self, macro: Macro, invocations: set[Invocation]) -> TranslationRecord:
+    def translate_macro_to_non_void_function(self, macro: Macro, invocations: list[Invocation]) -> TranslationRecord:
         invocation = next(iter(invocations))
 
         translation = f"static inline {invocation.TypeSignature} {{ return {macro.Body}; }}"
         return TranslationRecord(macro, invocations, translation, TranslationTarget.NON_VOID_FUNCTION)
 
-    def translate_macro_to_global_variable(self, macro: Macro, invocations: set[Invocation]) -> MacroRecord:
+    def translate_macro_to_global_variable(self, macro: Macro, invocations: list[Invocation]) -> MacroRecord:
         invocation = next(iter(invocations))
         translation = f"static const {invocation.TypeSignature} = {macro.Body};"
         return TranslationRecord(macro, invocations, translation, TranslationTarget.GLOBAL_VARIABLE)
 
-    def translate_macro_to_enum(self, macro: Macro, invocations: set[Invocation]) -> MacroRecord:
+    def translate_macro_to_enum(self, macro: Macro, invocations: list[Invocation]) -> MacroRecord:
         translation = f"enum {{ {macro.Name} = {macro.Body} }};"
         return TranslationRecord(macro, invocations, translation, TranslationTarget.ENUM)
@@ -3,9 +3,9 @@ from macros import Invocation, PreprocessorData
 
 def aa_invocation(i: Invocation, pd: PreprocessorData) -> bool:
     assert i.IsTopLevelNonArgument
-    return i.HasSemanticData and all([
+    return i.HasSemanticData and (
         # Can be turned into a function or variable
-        i.CanBeTurnedIntoAFunctionOrVariable,
+        i.CanBeTurnedIntoAFunctionOrVariable and
         # Argument-altering
-        i.MustAlterArgumentsOrReturnTypeToTransform,
-    ])
+        i.MustAlterArgumentsOrReturnTypeToTransform
+    )
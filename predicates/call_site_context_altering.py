@@ -6,9 +6,9 @@ def csca_invocation(i: Invocation, pd: PreprocessorData) -> bool:
     # If not aligned, then call-site-context-altering
     return (not i.IsAligned or
             # Must have semantic data
-            (i.HasSemanticData and all([
+            (i.HasSemanticData and (
                 # Can be transformed to a function or variable
-                i.CanBeTurnedIntoAFunctionOrVariable,
+                i.CanBeTurnedIntoAFunctionOrVariable and
                 # Call-site altering
                 i.MustAlterCallSiteToTransform
-            ])))
+            )))
@@ -42,12 +42,12 @@ class TranslationTarget(Enum):
     NON_VOID_FUNCTION = auto()
     VOID_FUNCTION = auto()
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Condition:
     check: Callable[[Invocation, PreprocessorData], bool]
     result: IEResult
 
-def check_conditions(invocations: set[Invocation], pd: PreprocessorData, conditions: list[Condition]) -> IEResult:
+def check_conditions(invocations: list[Invocation], pd: PreprocessorData, conditions: list[Condition]) -> IEResult:
     for invocation in invocations:
         for condition in conditions:
             if not condition.check(invocation, pd):
@@ -105,15 +105,16 @@ ARGUMENT_CONDITIONS = [
 def ie_def(m: Macro, pd: PreprocessorData, translation_config: TranslationConfig) -> tuple[IEResult, TranslationTarget | None]:
     is_ = pd.mm[m]
     # We only analyze top-level non-argument invocations
-    assert all([i.IsTopLevelNonArgument for i in is_])
+    assert all(i.IsTopLevelNonArgument for i in is_)
     # We must have semantic data for all invocations
-    if not all([i.HasSemanticData for i in is_]):
+    if not all(i.HasSemanticData for i in is_):
         return IEResult.SYNTACTICALLY_INVALID_PROPERTY, None
     # The macro must be expanded at least once
     if len(is_) == 0:
         return IEResult.MACRO_NEVER_EXPANDED, None
     # All invocations must have the same type signature
-    if len(set([i.TypeSignature for i in is_])) != 1:
+    type_signature = next(iter(is_)).TypeSignature
+    if any(i.TypeSignature != type_signature for i in is_):
         return IEResult.POLYMORPHIC, None
     # The macro must be defined at global scope
     if not m.IsDefinedAtGlobalScope:
@@ -122,21 +123,22 @@ def ie_def(m: Macro, pd: PreprocessorData, translation_config: TranslationConfig
     global_condition_check = check_conditions(invocations=is_,
                                               pd=pd,
                                               conditions=GLOBAL_CONDITIONS)
-    if global_condition_check != IEResult.VALID:
+    if global_condition_check is not IEResult.VALID:
         return global_condition_check, None
 
+    # Each target's conditions are only checked if no preferred target applies
     if m.IsObjectLike:
         variable_condition_check = check_conditions(invocations=is_,
                                                     pd=pd,
                                                     conditions=VARIABLE_CONDITIONS)
+        if variable_condition_check is IEResult.VALID:
+            return IEResult.VALID, TranslationTarget.GLOBAL_VARIABLE
+
         enum_condition_check = check_conditions(invocations=is_,
                                                 pd=pd,
                                                 conditions=ENUM_CONDITIONS)
-
-        if variable_condition_check == IEResult.VALID:
-            return IEResult.VALID, TranslationTarget.GLOBAL_VARIABLE
-        elif enum_condition_check == IEResult.VALID:
-            if all([i.CanBeTurnedIntoEnumWithIntSize(translation_config.int_size) for i in is_]):
+        if enum_condition_check is IEResult.VALID:
+            if all(i.CanBeTurnedIntoEnumWithIntSize(translation_config.int_size) for i in is_):
                 return enum_condition_check, TranslationTarget.ENUM
             else:
                 return IEResult.INVOKED_WHERE_ICE_REQUIRED_AND_GREATER_THAN_INT_SIZE, None
@@ -149,19 +151,19 @@ def ie_def(m: Macro, pd: PreprocessorData, translation_config: TranslationConfig
                                                     pd=pd,
                                                     conditions=ARGUMENT_CONDITIONS)
 
-        if argument_condition_check != IEResult.VALID:
+        if argument_condition_check is not IEResult.VALID:
             return argument_condition_check, None
 
         non_void_condition_check = check_conditions(invocations=is_,
                                                     pd=pd,
                                                     conditions=NON_VOID_CONDITIONS)
+        if non_void_condition_check is IEResult.VALID:
+            return non_void_condition_check, TranslationTarget.NON_VOID_FUNCTION
+
         void_condition_check = check_conditions(invocations=is_,
                                                 pd=pd,
                                                 conditions=VOID_CONDITIONS)
-
-        if non_void_condition_check == IEResult.VALID:
-            return non_void_condition_check, TranslationTarget.NON_VOID_FUNCTION
-        elif void_condition_check == IEResult.VALID:
+        if void_condition_check is IEResult.VALID:
             return void_condition_check, TranslationTarget.VOID_FUNCTION
         else:
             return void_condition_check, None
@@ -7,45 +7,46 @@ from macros import Macro, PreprocessorData
 def mennie_def(m: Macro, pd: PreprocessorData) -> bool:
     is_ = pd.mm[m]
     # We only analyze top-level non-argument invocations
-    assert all([i.IsTopLevelNonArgument for i in is_])
+    assert all(i.IsTopLevelNonArgument for i in is_)
     # We must have semantic data for all invocations
-    if not all([i.HasSemanticData for i in is_]):
+    if not all(i.HasSemanticData for i in is_):
         return False
     # The macro must be expanded at least once
     if len(is_) == 0:
         return False
     # All invocations must have the same type signature
-    if len(set([i.TypeSignature for i in is_])) != 1:
+    type_signature = next(iter(is_)).TypeSignature
+    if any(i.TypeSignature != type_signature for i in is_):
         return False
-    return (m.IsObjectLike and all([
-            all([
+    return (m.IsObjectLike and all(
+            (
                 # Valid for analysis
-                i.HasSemanticData,
+                i.HasSemanticData and
 
                 # Can be turn into a variable
-                i.IsObjectLike,
-                i.CanBeTurnedIntoVariable,
+                i.IsObjectLike and
+                i.CanBeTurnedIntoVariable and
 
                 # Alignment (also used for callsite-context-altering)
-                i.IsAligned,
+                i.IsAligned and
 
                 # Argument-altering
-                not i.MustAlterArgumentsOrReturnTypeToTransform,
+                not i.MustAlterArgumentsOrReturnTypeToTransform and
 
                 # Declaration-altering
-                i.DefinitionLocationFilename not in pd.local_includes,
-                i.Name not in pd.inspected_macro_names,
-                not i.IsNamePresentInCPPConditional,
-                not i.MustAlterDeclarationsToTransform,
+                i.DefinitionLocationFilename not in pd.local_includes and
+                i.Name not in pd.inspected_macro_names and
+                not i.IsNamePresentInCPPConditional and
+                not i.MustAlterDeclarationsToTransform and
 
                 # Call-site-context-altering
-                not i.MustAlterCallSiteToTransform,
+                not i.MustAlterCallSiteToTransform and
 
                 # Thunkizing
-                not i.MustCreateThunksToTransform,
+                not i.MustCreateThunksToTransform and
 
                 # Metaprogramming
                 not i.MustUseMetaprogrammingToTransform
-            ])
+            )
             for i in is_
-            ]))
+            ))
@@ -9,28 +9,72 @@ import os
 import json
 import subprocess
 import concurrent.futures
-from typing import Any
+import contextlib
+from typing import Any, Iterator, TextIO
 import pathlib
 import hashlib
+import tempfile
+import shutil
 
-logger = logging.getLogger(__name__)
+from jsonstream import iter_json_array
 
+logger = logging.getLogger(__name__)
 
-@dataclass(frozen=True)
+# Arguments passed to clang after the source file
+MAKI_TRAILING_ARGS = (
+    # at the very end, specify that we are only doing syntactic analysis
+    # so as to not waste time compiling
+    '-fsyntax-only',
+    # Add ignore flags for system headers, builtins, and invalid locations
+    '-fplugin-arg-maki---no-system-macros',
+    '-fplugin-arg-maki---no-builtin-macros',
+    '-fplugin-arg-maki---no-invalid-macros',
+)
+
+def get_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+# Reading the umask means briefly changing it, which is not safe once worker
+# threads are creating files, so only read it once, at import time
+UMASK = get_umask()
+
+@contextlib.contextmanager
+def atomic_write(path: str | pathlib.Path) -> Iterator[TextIO]:
+    """
+    Write to a temporary file next to path, which is only moved onto path once
+    it has been completely written. A failed or interrupted write removes the
+    temporary file and leaves any existing file at path untouched
+    """
+    f = tempfile.NamedTemporaryFile('w', dir=os.path.dirname(path), suffix='.tmp', delete=False)
+    try:
+        with f:
+            yield f
+        # NamedTemporaryFile creates the file readable only by us, so give it
+        # the permissions an ordinarily created file would have
+        os.chmod(f.name, 0o666 & ~UMASK)
+        os.replace(f.name, path)
+    except BaseException:
+        os.unlink(f.name)
+        raise
+
+
+@dataclass(frozen=True, slots=True)
 class CompileCommand:
     directory: str
-    arguments: list[str]
+    arguments: tuple[str, ...]
     file: str
 
     @staticmethod
     def from_json(json_file: dict) -> 'CompileCommand':
 
         # compile_commands.json can either have "arguments" or "command" key
-        # We always want a list of arguments, so split command if there is no arguments list
+        # We always want a tuple of arguments, so split command if there is no arguments list
         if "arguments" in json_file:
-            arguments = json_file["arguments"]
+            arguments = tuple(json_file["arguments"])
         elif "command" in json_file:
-            arguments = shlex.split(json_file["command"])
+            arguments = tuple(shlex.split(json_file["command"]))
         else:
             raise ValueError("Compile command must have either 'arguments' or 'command' key")
 
@@ -43,86 +87,108 @@ class CompileCommand:
     def get_cache_key(self) -> str:
         """
         Cache key for use with AnalysisCache.
-        Note that this does NOT hash file contents, only the arguments of each CompileCommand!
+        Hashes the directory, arguments, and file of the CompileCommand, and the
+        contents of its source file.
+        Note that this does NOT hash the contents of any headers the file includes!
         """
-        sha1 = hashlib.sha1()
-        sha1.update(repr(self.arguments).encode())
-        return sha1.hexdigest()
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((self.directory, self.arguments, self.file)).encode())
+        with open(os.path.join(self.directory, self.file), 'rb') as f:
+            h.update(f.read())
+        return h.hexdigest()
 
 class AnalysisCache:
-    def __init__(self, cache_dir: str) -> None:
+    def __init__(self, cache_dir: str, maki_so_path: str) -> None:
         self.cache_dir = pathlib.Path(cache_dir).resolve()
         self.cache_dir.mkdir(exist_ok=True)
-
-    def get_cache_path(self, cc: CompileCommand) -> pathlib.Path:
-        cc_hash = cc.get_cache_key()
+        # Results from a rebuilt plugin or an upgraded clang may differ, so key
+        # results on both of them too
+        maki_so_stat = os.stat(maki_so_path)
+        self.toolchain_key = f"{maki_so_path}:{maki_so_stat.st_mtime_ns}:{maki_so_stat.st_size}"
+        clang_path = shutil.which("clang-17")
+        if clang_path is not None:
+            clang_stat = os.stat(clang_path)
+            self.toolchain_key += f":{clang_path}:{clang_stat.st_mtime_ns}:{clang_stat.st_size}"
+
+    def get_cache_path(self, cc: CompileCommand) -> pathlib.Path | None:
+        try:
+            cc_key = cc.get_cache_key()
+        except OSError:
+            # Can't read the source file, so there is nothing to cache
+            return None
+        cc_hash = hashlib.blake2b(f"{self.toolchain_key}:{cc_key}".encode(), digest_size=16).hexdigest()
         return self.cache_dir / f"{cc_hash}.json"
 
-    def get_cached_result(self, cc: CompileCommand) -> list[dict[str, Any]] | None:
-        cache_path = self.get_cache_path(cc)
-
-        if cache_path.exists():
-            try:
-                with open(cache_path, 'r') as f:
-                    logger.info(f"Loading {cc.file} from cache")
-                    return json.load(f)
-            except json.JSONDecodeError:
-                logger.warning(f"Corrupted cache file for {cc.file} at path {cache_path}, ignoring")
+    def get_cached_result(self, cc: CompileCommand, cache_path: pathlib.Path) -> list[dict[str, Any]] | None:
+        # Just try to open the cache file, rather than checking if it exists first
+        try:
+            with open(cache_path, 'rb') as f:
+                logger.info("Loading %s from cache", cc.file)
+                return json.loads(f.read())
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError:
+            logger.warning("Corrupted cache file for %s at path %s, ignoring", cc.file, cache_path)
+        except OSError as e:
+            # e.g. an entry written by another user without read permission
+            logger.warning("Could not read cache file for %s at path %s, ignoring: %s", cc.file, cache_path, e)
 
         return None
-        
 
-    def cache_result(self, cc: CompileCommand, results: list[dict[str, Any]]) -> None:
-        cache_path = self.get_cache_path(cc)
-        with open(cache_path, 'w+') as f:
-            json.dump(results, f)
+    def cache_result(self, cache_path: pathlib.Path, results: list[dict[str, Any]]) -> None:
+        # An interrupted run must never leave a truncated cache file behind
+        try:
+            with atomic_write(cache_path) as f:
+                f.write(json.dumps(results))
+        except OSError as e:
+            # Failing to cache a result shouldn't lose the result itself
+            logger.warning("Could not write cache file at path %s, ignoring: %s", cache_path, e)
 
 
 def run_maki_on_compile_command(cc: CompileCommand, maki_so_path: str, cache: AnalysisCache | None) -> list[dict[str, Any]]:
 
-    if cache is not None:
-        if (result := cache.get_cached_result(cc)) is not None:
+    # The cache path is computed once, before clang runs, so that results are
+    # stored under the key of the source file contents they were computed from,
+    # even if the file is edited in the meantime
+    cache_path = cache.get_cache_path(cc) if cache is not None else None
+    if cache_path is not None:
+        if (result := cache.get_cached_result(cc, cache_path)) is not None:
             return result
 
-    # Make copy to avoid changing args in place
-    args = cc.arguments.copy()
-
-    args[0] = "clang-17"
-    # pass maki plugin shared library file
-    args.insert(1, f'-fplugin={maki_so_path}')
-    args.append(cc.file)
-    # at the very end, specify that we are only doing syntactic analysis
-    # so as to not waste time compiling
-    args.append('-fsyntax-only')
-
-    # Add ignore flags for system headers, builtins, and invalid locations
-    args.append('-fplugin-arg-maki---no-system-macros')
-    args.append('-fplugin-arg-maki---no-builtin-macros')
-    args.append('-fplugin-arg-maki---no-invalid-macros')
+    args = ["clang-17",
+            # pass maki plugin shared library file
+            f'-fplugin={maki_so_path}',
+            *cc.arguments[1:],
+            cc.file,
+            *MAKI_TRAILING_ARGS]
 
 
     try:
-        # lot of build processes do include paths relative to source file directory
-        os.chdir(cc.directory)
+        # Only join the arguments if they will actually be logged
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Compiling %s with args %s", cc.file, ' '.join(args))
 
-        logger.info(f"Compiling {cc.file} with args {' '.join(args)}")
-
-        process = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        # lot of build processes do include paths relative to source file directory,
+        # so run clang from there. This is set for the child only, as the
+        # working directory of this process is shared by all worker threads
+        process = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+                                 cwd=cc.directory)
 
         # stderr
         if process.stderr:
-            logger.warning(f"clang stderr with args {' '.join(args)}:")
-            logger.warning(f"{process.stderr.decode()}")
+            logger.warning("clang stderr with args %s:", ' '.join(args))
+            logger.warning("%s", process.stderr.decode())
 
-        result = json.loads(process.stdout.decode())
-        if cache is not None:
-            cache.cache_result(cc, result)
+        result = json.loads(process.stdout)
+        if cache_path is not None:
+            cache.cache_result(cache_path, result)
 
         return result
     except subprocess.CalledProcessError as e:
-        logger.error(f"ERROR ON file {cc.file} w/ returncode {e.returncode}\n"
-                     f"Command: {' '.join(args)}\n"
-                     f"{e.stderr.decode()}")
+        logger.error("ERROR ON file %s w/ returncode %d\n"
+                     "Command: %s\n"
+                     "%s",
+                     cc.file, e.returncode, ' '.join(args), e.stderr.decode())
         return []
 
 def is_source_file(arg: str) -> bool:
@@ -135,7 +201,7 @@ def split_compile_commands_by_src_file(cc: CompileCommand) -> list[CompileComman
     """
 
     # Filter out all source files from the arguments
-    arguments_no_src_files = [arg for arg in cc.arguments if not is_source_file(arg)]
+    arguments_no_src_files = tuple(arg for arg in cc.arguments if not is_source_file(arg))
 
     # Return a list of CompileCommands for each source file in the original compile command args
     return [
@@ -144,6 +210,15 @@ def split_compile_commands_by_src_file(cc: CompileCommand) -> list[CompileComman
     ]
     
 
+def get_available_cpu_count() -> int:
+    """
+    Number of CPUs this process may run on, which may be fewer than the number
+    on the system (e.g. in a container or under taskset)
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('-p', '--plugin_path', type=str, required=True,
@@ -154,13 +229,13 @@ def main():
                     help='Path to compile_commands.json')
     ap.add_argument('-o', '--analysis_out_path', type=str, default='analysis.maki',
                     help='Path to output maki analysis file. Default is analysis.maki')
-    ap.add_argument('-j', '--num_jobs', type=int, default=os.cpu_count(),
-                    help='Number of threads to use. Default is number of CPUs on system')
+    ap.add_argument('-j', '--num_jobs', type=int, default=get_available_cpu_count(),
+                    help='Number of threads to use. Default is number of CPUs available to this process')
     ap.add_argument('-v', '--verbose', action='store_true')
     ap.add_argument('--cache-dir', type=pathlib.Path, required=False,
                     help='(Optional) Enable caching analysis results and place them in this path.\n'
-                          'Note that this will serve outdated results if the source files in the input program changes,\n'
-                          'or if a version of Maki with different output is used!')
+                          'Results are invalidated when a source file, its compile command, the Maki plugin, or clang changes.\n'
+                          'Note that this will serve outdated results if only the headers a source file includes change!')
     args = ap.parse_args()
 
     plugin_path = os.path.abspath(args.plugin_path)
@@ -172,46 +247,71 @@ def main():
     log_level = logging.INFO if args.verbose else logging.WARNING
     logging.basicConfig(level=log_level)
 
-    # Load the compile_commands.json file (fail if it doesn't exist)
+    # Set up the analysis cache, if enabled (fail if the plugin or cache
+    # directory can't be accessed)
+    cache = None
+    if args.cache_dir is not None:
+        try:
+            cache = AnalysisCache(args.cache_dir, plugin_path)
+        except OSError as e:
+            logger.critical("Could not set up the analysis cache in %s: %s", args.cache_dir, e)
+            return
+
+    # Open the compile_commands.json file (fail if it doesn't exist)
     try:
-        with open(compile_commands) as fp:
-            compile_commands = json.load(fp)
+        compile_commands_fp = open(compile_commands)
     except FileNotFoundError:
-        logger.critical(f"Could not find compile_commands.json in {src_dir}")
+        logger.critical("Could not find compile_commands.json in %s", src_dir)
         return
 
-    compile_commands = [CompileCommand.from_json(cc) for cc in compile_commands]
-
-    # Split compile commands into multiple compile commands for each source file
-    split_compile_commands = [split_cc for cc in compile_commands 
-                           for split_cc in split_compile_commands_by_src_file(cc)]
-
     # Run maki on each compile command threaded
-    cache = AnalysisCache(args.cache_dir) if args.cache_dir is not None else None
-    results_set = set()
-    with concurrent.futures.ProcessPoolExecutor(max_workers=num_jobs) as executor:
-        total = len(split_compile_commands)
+    # Unique results are written out as soon as they are seen, so rather than
+    # keeping every result in memory, only keep a digest of each encoded result
+    seen_result_digests: set[bytes] = set()
+    # The analysis is written atomically, so that a failed or interrupted run
+    # leaves any previous analysis intact rather than a truncated one.
+    # Workers spend nearly all of their time waiting on clang, so threads suffice
+    with (compile_commands_fp,
+          atomic_write(analysis_out_path) as out,
+          concurrent.futures.ThreadPoolExecutor(max_workers=num_jobs) as executor):
+        # Mapping of future to CompileCommand
+        results = {}
+        # The same file may be compiled with the same arguments more than once
+        # (e.g. if it is built into several targets), but only needs to be analyzed once
+        seen_compile_commands: set[CompileCommand] = set()
+
+        # compile_commands.json can be very large, so stream over it and start
+        # running Maki on each compile command as soon as it has been read
+        for cc_json in iter_json_array(compile_commands_fp):
+            # Split compile commands into multiple compile commands for each source file
+            for split_cc in split_compile_commands_by_src_file(CompileCommand.from_json(cc_json)):
+                if split_cc in seen_compile_commands:
+                    continue
+                seen_compile_commands.add(split_cc)
+                results[executor.submit(run_maki_on_compile_command, split_cc, plugin_path, cache)] = split_cc
+
+        total = len(results)
         processed = 0
 
-        # Mapping of CompileCommand to future
-        results = {executor.submit(run_maki_on_compile_command, cc, plugin_path, cache): cc for cc in split_compile_commands}
-                
+        # Write results to file, in the same format json.dumps would give the list
+        out.write('[')
+        separator = ''
         for future in concurrent.futures.as_completed(results):
+            # Drop our reference to the future so that its result can be freed
+            cc = results.pop(future)
             result = future.result()
             if result:
                 processed += 1
                 print(f"{processed} / {total} completed...")
-                for obj in result:
-                    obj_tuple = tuple(obj.items())
-                    results_set.add(obj_tuple)
+                for encoded_obj in map(json.dumps, result):
+                    digest = hashlib.blake2b(encoded_obj.encode(), digest_size=16).digest()
+                    if digest not in seen_result_digests:
+                        seen_result_digests.add(digest)
+                        out.write(separator + encoded_obj)
+                        separator = ', '
             else:
-                logger.error(f"{results[future].file} failed processing!")
-
-    results = [dict(obj) for obj in results_set]
-
-    # Write results to file 
-    with open(analysis_out_path, 'w') as out:
-        json.dump(results, out)
+                logger.error("%s failed processing!", cc.file)
+        out.write(']')
 
 
 if __name__ == "__main__":
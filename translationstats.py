@@ -23,7 +23,7 @@ class MacroRecord:
     Base class for all macro records
     """
     macro: Macro
-    invocations: set[Invocation]
+    invocations: list[Invocation]
 
 SkipType = TechnicalSkip | IEResult
 
@@ -39,6 +39,8 @@ class TranslationRecord(MacroRecord):
 @dataclass()
 class TranslationRecords:
     records_by_type: Counter[tuple[MacroType, SkipType | TranslationTarget]] = field(default_factory=Counter)
+    translated_by_macro_type: Counter[MacroType] = field(default_factory=Counter)
+    skipped_by_macro_type: Counter[MacroType] = field(default_factory=Counter)
     translation_records: list[TranslationRecord] = field(default_factory=list)
     skip_records: list[SkipRecord] = field(default_factory=list)
 
@@ -51,10 +53,10 @@ class TranslationRecords:
         return len(self.skip_records)
 
     def total_translated_by_type(self, macro_type: MacroType) -> int:
-        return len(list(record for record in self.translation_records if self._get_macro_type(record.macro) == macro_type))
+        return self.translated_by_macro_type[macro_type]
 
     def total_skipped_by_type(self, macro_type: MacroType) -> int:
-        return len(list(record for record in self.skip_records if self._get_macro_type(record.macro) == macro_type))
+        return self.skipped_by_macro_type[macro_type]
 
     def _get_macro_type(self, macro: Macro) -> MacroType:
         return MacroType.FUNCTION_LIKE if macro.IsFunctionLike else MacroType.OBJECT_LIKE
@@ -64,12 +66,14 @@ class TranslationRecords:
 
         self.translation_records.append(record)
         self.records_by_type[(macro_type, record.translation_type)] += 1
+        self.translated_by_macro_type[macro_type] += 1
 
     def add_skip_record(self, record: SkipRecord):
         macro_type = self._get_macro_type(record.macro)
 
         self.skip_records.append(record)
         self.records_by_type[(macro_type, record.skip_type)] += 1
+        self.skipped_by_macro_type[macro_type] += 1
 
     def print_totals(self):
         print(f"Total translated: {self.total_translated}")
@@ -107,22 +111,20 @@ class TranslationRecords:
             writer = csv.writer(csvfile, quoting=csv.QUOTE_MINIMAL)
             writer.writerow(["Program Name", "Macro", "Macro Type", "Action", "Translation or Macro Body", "Action Type", "Invocation Amount"])
 
-            for translation_record in self.translation_records:
-                writer.writerow([program_name,
-                                 translation_record.macro.Name,
-                                 self._get_macro_type(translation_record.macro),
-                                 "Translated",
-                                 translation_record.macro_translation,
-                                 translation_record.translation_type,
-                                 len(translation_record.invocations)]
-                                )
-
-            for skip_record in self.skip_records:
-                writer.writerow([program_name,
-                                 skip_record.macro.Name,
-                                 self._get_macro_type(skip_record.macro),
-                                 "Skipped",
-                                 skip_record.macro.Body,
-                                 skip_record.skip_type,
-                                 len(skip_record.invocations)]
-                                )
+            writer.writerows([program_name,
+                              translation_record.macro.Name,
+                              self._get_macro_type(translation_record.macro),
+                              "Translated",
+                              translation_record.macro_translation,
+                              translation_record.translation_type,
+                              len(translation_record.invocations)]
+                             for translation_record in self.translation_records)
+
+            writer.writerows([program_name,
+                              skip_record.macro.Name,
+                              self._get_macro_type(skip_record.macro),
+                              "Skipped",
+                              skip_record.macro.Body,
+                              skip_record.skip_type,
+                              len(skip_record.invocations)]
+                             for skip_record in self.skip_records)